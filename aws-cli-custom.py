@@ -2,83 +2,570 @@
 
 # Import necessary libraries
 # argparse: for handling command-line arguments
-# boto3: AWS SDK for Python to interact with AWS services
+# atexit, logging, sys: for buffering command output and writing it out in one go
 # botocore.exceptions: for handling various AWS-related exceptions
+# functools: for caching the lazily created AWS clients
+# json: for validating IAM policy documents and storing the instance ID cache
+# re: for matching instance 'Name' tags against wildcard names
+# tempfile, time: for the short-lived on-disk instance ID cache
+# threading: for resolving AWS credentials within a time limit
+# base64, hashlib, mmap: for computing the checksums of small S3 uploads
+# os: for sizing the S3 transfer thread pool to the available CPUs
+# concurrent.futures, multiprocessing: for uploading several files in parallel processes
+# contextlib, io, select, signal, socket, stat, struct: for capturing output and the
+# optional background daemon that keeps AWS clients warm between invocations
+# boto3 (AWS SDK for Python) is imported lazily when a client is first needed,
+# so that '--help' and argument errors do not pay its import cost
 import argparse
-import boto3
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
+import atexit
+import base64
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import logging
+import logging.handlers
+import mmap
+import os
+import re
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError, ProfileNotFound
 
-# Initialize AWS clients for EC2, S3, and IAM services
-ec2 = boto3.client('ec2')  # EC2 client for managing instances
-s3 = boto3.client('s3')    # S3 client for handling object storage
-iam = boto3.client('iam')  # IAM client for managing policies and roles
+# Set up output logging. Messages are collected in memory and written to stdout in
+# batches (immediately for errors), instead of one write per message.
+log = logging.getLogger('aws-cli-custom')
+log.setLevel(logging.INFO)
+log.propagate = False
+stream_handler = logging.StreamHandler(sys.stdout)
+stream_handler.setFormatter(logging.Formatter('%(message)s'))
+handler = logging.handlers.MemoryHandler(capacity=1024, target=stream_handler)
+log.addHandler(handler)
+atexit.register(handler.flush)
 
-# Function to start EC2 instances based on the instance name
-def start_ec2(instance_name):
+# Helper context manager to collect all command output in string buffers
+@contextlib.contextmanager
+def captured_output():
     """
-    Starts EC2 instance(s) with a given name.
+    Redirects log output and anything written to stdout into one string buffer, and
+    anything written to stderr (e.g. argparse usage errors) into another, for the
+    duration of the block.
 
-    :param instance_name: Name of the EC2 instance (tagged with 'Name') to start
+    :return: Tuple of io.StringIO buffers holding the captured (stdout, stderr)
     """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    handler.flush()
+    previous_stream = stream_handler.setStream(stdout)
     try:
-        # Retrieve instance IDs matching the given name
-        instance_ids = get_instance_id_by_name(instance_name)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            yield stdout, stderr
+    finally:
+        handler.flush()
+        stream_handler.setStream(previous_stream)
+
+# Commands are only forwarded to a running daemon if every environment variable with
+# this prefix (credentials, profile, region, endpoints, retry settings and this tool's
+# own settings), as well as the proxy variables, match the daemon's own environment
+DAEMON_ENV_PREFIX = 'AWS_'
+DAEMON_ENV_VARS = ('HTTP_PROXY', 'HTTPS_PROXY', 'NO_PROXY', 'http_proxy', 'https_proxy', 'no_proxy')
+# Maximum number of seconds the daemon and its clients wait on each other while
+# connecting and exchanging a request or response
+DAEMON_IO_TIMEOUT = 5
+
+# Maximum number of seconds to wait for the AWS credential provider chain to locate
+# credentials. The environment variable overrides it (0 disables the limit)
+CREDENTIALS_TIMEOUT = 0.5
+CREDENTIALS_TIMEOUT_ENV = 'AWS_CLI_CUSTOM_CREDENTIALS_TIMEOUT'
+# Profile settings whose credentials may take network round trips (STS, SSO), an
+# external program or an MFA prompt to obtain; such profiles have no time limit
+SLOW_CREDENTIAL_SETTINGS = ('role_arn', 'web_identity_token_file', 'credential_process',
+                            'sso_session', 'sso_start_url', 'mfa_serial')
+
+# Maximum number of attempts (including the first) for each EC2 API call
+EC2_MAX_ATTEMPTS = 10
+
+# Default S3 transfer settings: files above the threshold are uploaded as
+# parallel multipart uploads using large parts
+MULTIPART_THRESHOLD = 8 * 1024 * 1024   # 8 MiB
+MULTIPART_CHUNKSIZE = 50 * 1024 * 1024  # 50 MiB
+MAX_CONCURRENCY = max(8, (os.cpu_count() or 1) * 2)
+# Minimum number of HTTPS connections the S3 client keeps open (botocore's default).
+# The pool grows with the upload concurrency, so that parts beyond the tenth
+# in-flight one are not forced onto new TLS connections
+S3_MIN_POOL_CONNECTIONS = 10
+
+# Lazily create AWS clients for EC2, S3, and IAM services. Each client is built
+# on first use and reused afterwards, and all of them share a single session so
+# configuration, credentials and service models are only loaded once.
+@functools.lru_cache(maxsize=None)
+def _session():
+    """
+    boto3 session shared by all AWS clients. Credentials are located once, up front,
+    within a time limit where applicable (see credentials_timeout).
+    """
+    import boto3
+    import botocore.session
+    if sys.platform.startswith('linux') and not _running_on_ec2():
+        # Skip the instance metadata (IMDS) credential provider off EC2, where its
+        # connection attempts can only time out
+        os.environ.setdefault('AWS_EC2_METADATA_DISABLED', 'true')
+    botocore_session = botocore.session.get_session()
+    session = boto3.session.Session(botocore_session=botocore_session)
+    resolve_credentials(session, credentials_timeout(botocore_session))
+    return session
+
+# Helper function to detect whether the tool is running on an EC2 instance
+def _running_on_ec2():
+    """
+    Checks the hypervisor and DMI information exposed by Linux for EC2 markers.
+
+    :return: True if running on an EC2 instance, False otherwise
+    """
+    markers = (
+        ('/sys/hypervisor/uuid', 'ec2'),                        # Xen-based instances
+        ('/sys/devices/virtual/dmi/id/sys_vendor', 'amazon ec2'),  # Nitro-based instances
+    )
+    for path, prefix in markers:
+        try:
+            with open(path) as f:
+                if f.read().strip().lower().startswith(prefix):
+                    return True
+        except OSError:
+            continue
+    return False
+
+# Helper function to choose the time limit for locating AWS credentials
+def credentials_timeout(botocore_session):
+    """
+    Returns the time limit for locating credentials: the value of the
+    AWS_CLI_CUSTOM_CREDENTIALS_TIMEOUT environment variable if set, no limit for
+    profiles using any of SLOW_CREDENTIAL_SETTINGS, and CREDENTIALS_TIMEOUT otherwise.
+
+    :param botocore_session: botocore session whose profile is checked
+    :return: Maximum number of seconds to wait, or None for no limit
+    """
+    value = os.environ.get(CREDENTIALS_TIMEOUT_ENV)
+    if value is not None:
+        try:
+            timeout = float(value)
+        except ValueError:
+            log.warning(f"Ignoring invalid {CREDENTIALS_TIMEOUT_ENV} value: {value}")
+        else:
+            return timeout if timeout > 0 else None
+    try:
+        profile_config = botocore_session.get_scoped_config()
+    except ProfileNotFound:
+        # Reported by the credential lookup itself
+        return CREDENTIALS_TIMEOUT
+    if any(setting in profile_config for setting in SLOW_CREDENTIAL_SETTINGS):
+        return None
+    return CREDENTIALS_TIMEOUT
+
+# Helper function to resolve AWS credentials within a time limit
+def resolve_credentials(session, timeout=CREDENTIALS_TIMEOUT):
+    """
+    Locates the session's credentials once, so every client reuses them, and exits
+    if the credential provider chain does not answer within the timeout. Refreshable
+    credentials (e.g. assumed roles) are fetched later, when first used.
+
+    :param session: boto3 session whose credentials are resolved
+    :param timeout: Maximum number of seconds to wait for the credentials, or None
+                    for no limit
+    """
+    if timeout is None:
+        session.get_credentials()
+        return
+
+    result = {}
+
+    def resolve():
+        try:
+            session.get_credentials()
+        except Exception as e:
+            result['error'] = e
+
+    # Resolve in a daemon thread, so a hung provider does not block exiting
+    thread = threading.Thread(target=resolve, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        log.error(f"No AWS credentials reachable within {timeout} seconds; check your AWS configuration "
+                  f"or raise the limit with {CREDENTIALS_TIMEOUT_ENV}")
+        sys.exit(2)
+    if 'error' in result:
+        raise result['error']
+
+@functools.lru_cache(maxsize=None)
+def _ec2():
+    """
+    EC2 client for managing instances. It uses botocore's adaptive retry mode, which
+    rate-limits the client when EC2 throttles requests (common for DescribeInstances)
+    instead of retrying blindly.
+    """
+    from botocore.config import Config
+    config = Config(retries={'mode': 'adaptive', 'max_attempts': EC2_MAX_ATTEMPTS})
+    return _session().client('ec2', config=config)
+
+@functools.lru_cache(maxsize=None)
+def _s3(accelerate=False, max_concurrency=MAX_CONCURRENCY):
+    """
+    S3 client for handling object storage. The connection pool is sized to the number
+    of parts uploaded in parallel, and TCP keepalive keeps idle pooled connections
+    usable. A separate client is cached for each combination of arguments.
+
+    :param accelerate: Whether to use the S3 Transfer Acceleration endpoint
+    :param max_concurrency: Maximum number of parts uploaded in parallel through the client
+    """
+    from botocore.config import Config
+    config = Config(
+        tcp_keepalive=True,
+        max_pool_connections=max(max_concurrency, S3_MIN_POOL_CONNECTIONS),
+        s3={'use_accelerate_endpoint': accelerate}
+    )
+    return _session().client('s3', config=config)
+
+@functools.lru_cache(maxsize=None)
+def _iam():
+    """IAM client for managing policies and roles."""
+    return _session().client('iam')
+
+# Block size used when hashing files for single-request uploads
+HASH_BLOCK_SIZE = 1024 * 1024  # 1 MiB
+
+# Maximum size of a managed IAM policy document, in characters excluding whitespace
+MAX_POLICY_SIZE = 6144
+
+# On-disk cache of the instances (and their states) looked up by name, so that
+# commands run shortly after each other for the same names (e.g. 'stop-ec2 foo' after
+# a 'start-ec2 foo' that found foo already running) do not repeat DescribeInstances
+INSTANCE_CACHE_FILE = os.path.expanduser('~/.aws-cli-custom-cache.json')
+INSTANCE_CACHE_TTL = 30  # seconds
+# Instance states looked up (and cached) by name; terminated and shutting-down
+# instances are left out, since they can be neither started nor stopped
+LOOKUP_STATES = ['pending', 'running', 'stopping', 'stopped']
+
+# Function to start EC2 instances based on their names
+def start_ec2(instance_names):
+    """
+    Starts the stopped EC2 instance(s) with the given names using a single
+    StartInstances call. Instances that are not stopped are left untouched.
+
+    :param instance_names: List of names of EC2 instances (tagged with 'Name') to start
+    """
+    states = ['stopped']
+    try:
+        # Retrieve the IDs of stopped instances matching the given names
+        instance_ids_by_name = get_instance_ids_by_names(instance_names, states=states)
+        instance_ids = flatten_instance_ids(instance_ids_by_name)
         if instance_ids:
             # Start the EC2 instance(s)
-            ec2.start_instances(InstanceIds=instance_ids)
-            print(f"Starting instance(s): {', '.join(instance_ids)}")
-    except ClientError as e:
-        # Handle errors related to AWS services
-        print(f"Failed to start instance(s): {e}")
-    except Exception as e:
-        # Handle any other unexpected errors
-        print(f"Unexpected error: {e}")
+            _ec2().start_instances(InstanceIds=instance_ids)
+            log.info(f"Starting instance(s): {', '.join(instance_ids)}")
+            # The instances are now starting, so their cached states are out of date
+            invalidate_state_change(instance_ids)
+    except (ClientError, NoCredentialsError, PartialCredentialsError) as e:
+        # Handle errors related to AWS services; the cached IDs may be stale
+        invalidate_cached_instance_ids(instance_names)
+        log.error(f"Failed to start instance(s): {e}")
 
-# Function to stop EC2 instances based on the instance name
-def stop_ec2(instance_name):
+# Function to stop EC2 instances based on their names
+def stop_ec2(instance_names):
     """
-    Stops EC2 instance(s) with a given name.
+    Stops the running EC2 instance(s) with the given names using a single
+    StopInstances call. Instances that are not running are left untouched.
 
-    :param instance_name: Name of the EC2 instance (tagged with 'Name') to stop
+    :param instance_names: List of names of EC2 instances (tagged with 'Name') to stop
     """
+    states = ['running']
     try:
-        # Retrieve instance IDs matching the given name
-        instance_ids = get_instance_id_by_name(instance_name)
+        # Retrieve the IDs of running instances matching the given names
+        instance_ids_by_name = get_instance_ids_by_names(instance_names, states=states)
+        instance_ids = flatten_instance_ids(instance_ids_by_name)
         if instance_ids:
             # Stop the EC2 instance(s)
-            ec2.stop_instances(InstanceIds=instance_ids)
-            print(f"Stopping instance(s): {', '.join(instance_ids)}")
-    except ClientError as e:
-        # Handle errors related to AWS services
-        print(f"Failed to stop instance(s): {e}")
-    except Exception as e:
-        # Handle any other unexpected errors
-        print(f"Unexpected error: {e}")
+            _ec2().stop_instances(InstanceIds=instance_ids)
+            log.info(f"Stopping instance(s): {', '.join(instance_ids)}")
+            # The instances are now stopping, so their cached states are out of date
+            invalidate_state_change(instance_ids)
+    except (ClientError, NoCredentialsError, PartialCredentialsError) as e:
+        # Handle errors related to AWS services; the cached IDs may be stale
+        invalidate_cached_instance_ids(instance_names)
+        log.error(f"Failed to stop instance(s): {e}")
+
+# Helper function to choose the client used for S3 transfers
+def preferred_transfer_client():
+    """
+    Selects the AWS Common Runtime (CRT) transfer client when the optional 'awscrt'
+    package is installed, falling back to the classic pure-Python client otherwise.
+
+    :return: 'crt' if awscrt is available, otherwise 'classic'
+    """
+    try:
+        import awscrt  # noqa: F401
+    except ImportError:
+        return 'classic'
+    return 'crt'
+
+# Helper function to create the transfer manager used for multipart uploads
+def create_upload_manager(client, chunk_size, max_concurrency, allow_crt=True):
+    """
+    Creates a transfer manager for multipart uploads, preferring the CRT transfer
+    client and falling back to the classic one if the CRT client cannot be set up
+    (e.g. an awscrt version too old for boto3).
+
+    :param client: S3 client to upload with
+    :param chunk_size: Size in bytes of each part of a multipart upload
+    :param max_concurrency: Maximum number of parts uploaded in parallel
+    :param allow_crt: Whether the CRT transfer client may be used. The CRT client
+                      builds its own connection from the client's region and does not
+                      honour its Config (e.g. the Transfer Acceleration endpoint)
+    :return: Transfer manager, to be used as a context manager
+    """
+    from boto3.exceptions import Boto3Error
+    from boto3.s3.transfer import TransferConfig, create_transfer_manager
+    from botocore.exceptions import MissingDependencyException
+
+    if allow_crt and preferred_transfer_client() == 'crt':
+        # The CRT client rejects options it does not support, such as use_threads
+        crt_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=chunk_size,
+            max_concurrency=max_concurrency,
+            preferred_transfer_client='crt'
+        )
+        try:
+            return create_transfer_manager(client, crt_config)
+        except (Boto3Error, MissingDependencyException):
+            pass
+
+    config = TransferConfig(
+        multipart_threshold=MULTIPART_THRESHOLD,
+        multipart_chunksize=chunk_size,
+        max_concurrency=max_concurrency,
+        use_threads=True,
+        preferred_transfer_client='classic'
+    )
+    return create_transfer_manager(client, config)
+
+# Helper function to compute the checksums sent with a single-request S3 upload
+def compute_upload_checksums(f, size):
+    """
+    Computes the base64-encoded MD5 and SHA-256 digests of an open file in a single
+    pass over a memory map of it, so S3 can verify the integrity of the uploaded
+    object without the file being read again to checksum it.
+
+    :param f: File object opened in binary mode
+    :param size: Size of the file in bytes
+    :return: Tuple of (base64 MD5 digest, base64 SHA-256 digest)
+    """
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    if size > 0:
+        # Empty files cannot be memory-mapped, and need no hashing anyway
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            # Feed both hashes the same block while it is still in the CPU cache
+            for offset in range(0, size, HASH_BLOCK_SIZE):
+                block = view[offset:offset + HASH_BLOCK_SIZE]
+                md5.update(block)
+                sha256.update(block)
+                block.release()
+    return (
+        base64.b64encode(md5.digest()).decode('ascii'),
+        base64.b64encode(sha256.digest()).decode('ascii'),
+    )
 
 # Function to upload a file to an S3 bucket
-def upload_file_s3(bucket_name, file_name):
+def upload_file_s3(bucket_name, file_name, chunk_size=MULTIPART_CHUNKSIZE, max_concurrency=MAX_CONCURRENCY,
+                   accelerate=False):
     """
-    Uploads a file to the specified S3 bucket.
+    Uploads a file to the specified S3 bucket. Files smaller than MULTIPART_THRESHOLD
+    are sent with a single PutObject call; larger files use a multipart upload.
 
     :param bucket_name: Name of the S3 bucket
     :param file_name: Local path to the file being uploaded
+    :param chunk_size: Size in bytes of each part of a multipart upload
+    :param max_concurrency: Maximum number of parts uploaded in parallel
+    :param accelerate: Whether to upload through the S3 Transfer Acceleration endpoint
     """
     try:
-        # Upload the file to the specified S3 bucket
-        s3.upload_file(file_name, bucket_name, file_name)
-        print(f"Uploaded {file_name} to {bucket_name}")
+        size = os.path.getsize(file_name)
+        if size < MULTIPART_THRESHOLD:
+            # Upload small files with a single PUT, skipping the transfer manager
+            with open(file_name, 'rb') as f:
+                content_md5, checksum_sha256 = compute_upload_checksums(f, size)
+                # Supplying the SHA-256 checksum stops botocore from computing its
+                # own default checksum of the body while sending it
+                _s3(accelerate, max_concurrency).put_object(Bucket=bucket_name, Key=file_name, Body=f,
+                                                            ContentMD5=content_md5, ChecksumSHA256=checksum_sha256)
+            log.info(f"Uploaded {file_name} to {bucket_name}")
+            return
+
+        # Upload the file to the specified S3 bucket with large parts sent over several
+        # connections, and wait for it to complete. The file name (rather than an open
+        # file object) is passed so that each part is read from disk by its own worker
+        # instead of being buffered in memory
+        # Transfer Acceleration is only supported by the classic transfer client
+        with create_upload_manager(_s3(accelerate, max_concurrency), chunk_size, max_concurrency,
+                                   allow_crt=not accelerate) as manager:
+            manager.upload(file_name, bucket_name, file_name).result()
+        log.info(f"Uploaded {file_name} to {bucket_name}")
     except FileNotFoundError:
         # Handle case where the specified file is not found
-        print(f"File {file_name} not found")
+        log.error(f"File {file_name} not found")
+    except OSError as e:
+        # Handle other problems reading the file, e.g. a directory or missing permissions
+        log.error(f"Cannot read file {file_name}: {e.strerror or e}")
     except NoCredentialsError:
         # Handle missing AWS credentials
-        print("AWS credentials not found")
-    except ClientError as e:
+        log.error("AWS credentials not found")
+    except (ClientError, PartialCredentialsError) as e:
         # Handle errors related to AWS services
-        print(f"Failed to upload file to S3: {e}")
-    except Exception as e:
-        # Handle any other unexpected errors
-        print(f"Unexpected error: {e}")
+        log.error(f"Failed to upload file to S3: {e}")
+
+# Helper function run by the worker processes of upload_files_s3
+def _upload_one(bucket_name, file_name, chunk_size, max_concurrency, accelerate):
+    """
+    Uploads a single file from a worker process. Its output is captured and returned
+    to the parent process, which writes it out (worker processes exit without running
+    atexit handlers, and their stdout is not the one the daemon captures).
+
+    :param bucket_name: Name of the S3 bucket
+    :param file_name: Local path to the file being uploaded
+    :param chunk_size: Size in bytes of each part of a multipart upload
+    :param max_concurrency: Maximum number of parts uploaded in parallel
+    :param accelerate: Whether to upload through the S3 Transfer Acceleration endpoint
+    :return: Tuple of the (stdout, stderr) output produced while uploading the file
+    """
+    with captured_output() as (stdout, stderr):
+        upload_file_s3(bucket_name, file_name, chunk_size, max_concurrency, accelerate)
+    return stdout.getvalue(), stderr.getvalue()
+
+# Initializer of the worker processes of upload_files_s3
+def _init_upload_worker():
+    """
+    Disables the credentials time limit in a worker process: the parent process has
+    already located the credentials within it, so a slow lookup in a worker is not a
+    reason to abort an upload.
+    """
+    os.environ[CREDENTIALS_TIMEOUT_ENV] = '0'
+
+# Function to upload several files to an S3 bucket
+def upload_files_s3(bucket_name, file_names, chunk_size=MULTIPART_CHUNKSIZE, max_concurrency=MAX_CONCURRENCY,
+                    accelerate=False):
+    """
+    Uploads one or more files to the specified S3 bucket. Multiple files are uploaded
+    in parallel worker processes, so TLS and hashing work is not limited to the single
+    interpreter thread holding the GIL. The concurrency budget is shared between the
+    workers, and the output of every upload is written out even if one of them fails.
+
+    :param bucket_name: Name of the S3 bucket
+    :param file_names: List of local paths to the files being uploaded
+    :param chunk_size: Size in bytes of each part of a multipart upload
+    :param max_concurrency: Maximum number of parts uploaded in parallel across all files
+    :param accelerate: Whether to upload through the S3 Transfer Acceleration endpoint
+    """
+    if len(file_names) == 1:
+        # Nothing to parallelize, so avoid the cost of starting worker processes
+        upload_file_s3(bucket_name, file_names[0], chunk_size, max_concurrency, accelerate)
+        return
+
+    # Locate the credentials once, within the time limit, before starting any worker
+    _session()
+    # Workers are spawned rather than forked, since boto3 clients are not fork-safe;
+    # each worker creates its own S3 client on first use
+    max_workers = min(len(file_names), (os.cpu_count() or 1) * 2, max(max_concurrency, 1))
+    # Split the parts uploaded in parallel between the workers, rather than letting
+    # each of them open max_concurrency connections of its own
+    worker_concurrency = max(1, max_concurrency // max_workers)
+    context = multiprocessing.get_context('spawn')
+    error = None
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                             initializer=_init_upload_worker) as executor:
+        futures = [
+            executor.submit(_upload_one, bucket_name, file_name, chunk_size, worker_concurrency, accelerate)
+            for file_name in file_names
+        ]
+        for future in futures:
+            try:
+                output, errors = future.result()
+            except Exception as e:
+                # Keep collecting the output of the other uploads, and report the
+                # first failure once all of them have finished
+                error = error or e
+                continue
+            if output:
+                log.info(output.rstrip('\n'))
+            if errors:
+                handler.flush()
+                sys.stderr.write(errors)
+    if error is not None:
+        raise error
+
+# Helpers that make json.loads reject input that IAM does not accept as JSON
+def _reject_duplicate_keys(pairs):
+    """
+    object_pairs_hook for json.loads that fails on duplicate keys, which would
+    otherwise silently keep only the last value.
+
+    :param pairs: List of (key, value) pairs of a JSON object
+    :return: Dictionary of the pairs
+    :raises ValueError: If a key occurs more than once
+    """
+    document = {}
+    for key, value in pairs:
+        if key in document:
+            raise ValueError(f"Invalid policy document: duplicate key {key!r}")
+        document[key] = value
+    return document
+
+def _reject_constant(name):
+    """
+    parse_constant hook for json.loads that fails on NaN, Infinity and -Infinity,
+    which are not valid JSON.
+
+    :param name: Name of the constant
+    :raises ValueError: Always
+    """
+    raise ValueError(f"Invalid policy document: {name} is not valid JSON")
+
+# Helper function to validate an IAM policy document before sending it to AWS
+def parse_policy_document(policy_document):
+    """
+    Parses a policy document locally, so that malformed or oversized documents are
+    reported immediately instead of after a round trip to IAM, and re-serializes it
+    in compact form to keep the request small.
+
+    :param policy_document: Policy document in JSON format defining permissions
+    :return: Compact JSON string of the policy document
+    :raises ValueError: If the document is not valid JSON, has duplicate keys, is not
+                        a JSON object, or is larger than IAM allows for a managed policy
+    """
+    try:
+        document = json.loads(policy_document, object_pairs_hook=_reject_duplicate_keys,
+                              parse_constant=_reject_constant)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid policy document: {e.msg} (line {e.lineno}, column {e.colno})") from e
+    if not isinstance(document, dict):
+        raise ValueError("Invalid policy document: expected a JSON object")
+    # Drop all insignificant whitespace. Non-ASCII characters are kept as \uXXXX
+    # escapes, since IAM rejects characters outside the ASCII/Latin-1 range
+    compact_document = json.dumps(document, separators=(',', ':'))
+    # IAM does not count whitespace towards the managed policy size limit
+    size = len(''.join(compact_document.split()))
+    if size > MAX_POLICY_SIZE:
+        raise ValueError(f"Invalid policy document: {size} characters exceeds the IAM limit of {MAX_POLICY_SIZE}")
+    return compact_document
 
 # Function to create an IAM policy
 def create_policy(policy_name, policy_document):
@@ -89,78 +576,303 @@ def create_policy(policy_name, policy_document):
     :param policy_document: Policy document in JSON format defining permissions
     """
     try:
+        # Validate the policy document before making any AWS call
+        policy_document = parse_policy_document(policy_document)
+
         # Create a new IAM policy
-        response = iam.create_policy(
+        response = _iam().create_policy(
             PolicyName=policy_name,
             PolicyDocument=policy_document
         )
-        print(f"Created policy {policy_name}")
-    except ClientError as e:
+        log.info(f"Created policy {policy_name}")
+    except ValueError as e:
+        # Handle policy documents that are not valid JSON
+        log.error(str(e))
+    except (ClientError, NoCredentialsError, PartialCredentialsError) as e:
         # Handle errors related to AWS services
-        print(f"Failed to create policy: {e}")
-    except Exception as e:
-        # Handle any other unexpected errors
-        print(f"Unexpected error: {e}")
+        log.error(f"Failed to create policy: {e}")
+
+# Helper functions for the on-disk cache of instance IDs
+def _instance_cache_key(instance_name):
+    """
+    Builds the cache key for an instance name. The key includes the AWS profile and
+    region, so lookups made against different accounts or regions never collide.
+
+    :param instance_name: Name of the EC2 instance (tagged with 'Name')
+    :return: Cache key string
+    """
+    profile = _session().profile_name
+    return f"{profile}:{_ec2().meta.region_name}:{instance_name}"
+
+def _load_instance_cache():
+    """
+    Reads the instance ID cache from disk, dropping expired entries.
+
+    :return: Dictionary mapping cache keys to
+             {'instances': [[instance ID, state], ...], 'expires': timestamp}
+    """
+    try:
+        with open(INSTANCE_CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        # A missing or corrupt cache file is treated as an empty cache
+        return {}
+    now = time.time()
+    return {
+        key: entry for key, entry in cache.items()
+        if 'instances' in entry and entry.get('expires', 0) > now
+    }
+
+def _save_instance_cache(cache):
+    """
+    Writes the instance ID cache to disk atomically. Concurrent invocations may
+    overwrite each other's entries; that only costs an extra lookup, so no locking is
+    done. Failures are ignored, since the cache is only an optimization.
+
+    :param cache: Dictionary mapping cache keys to cache entries
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(INSTANCE_CACHE_FILE))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, INSTANCE_CACHE_FILE)
+    except OSError:
+        pass
 
-# Helper function to retrieve EC2 instance IDs based on instance name tag
-def get_instance_id_by_name(instance_name):
+def get_cached_instances(cache, instance_name):
     """
-    Retrieves EC2 instance IDs by searching for instances with a specific 'Name' tag.
+    Returns the cached instances for a name, if they have not expired.
 
-    :param instance_name: Name of the EC2 instance (tagged with 'Name') to retrieve
-    :return: List of instance IDs matching the provided name, or None if no instances are found
+    :param cache: Instance ID cache, as returned by _load_instance_cache
+    :param instance_name: Name of the EC2 instance (tagged with 'Name')
+    :return: List of [instance ID, state] pairs, or None on a cache miss
+    """
+    entry = cache.get(_instance_cache_key(instance_name))
+    return entry['instances'] if entry else None
+
+def cache_instances(cache, instance_name, instances):
+    """
+    Stores the instances of a name, with their states, for INSTANCE_CACHE_TTL seconds.
+    Only the in-memory cache is updated; the caller saves it once all names are stored.
+
+    :param cache: Instance ID cache, as returned by _load_instance_cache
+    :param instance_name: Name of the EC2 instance (tagged with 'Name')
+    :param instances: List of [instance ID, state] pairs matching the name
+    """
+    key = _instance_cache_key(instance_name)
+    cache[key] = {'instances': instances, 'expires': time.time() + INSTANCE_CACHE_TTL}
+
+def invalidate_cached_instance_ids(instance_names):
+    """
+    Removes the cached instances of several names, e.g. after AWS rejected them,
+    reading and writing the cache file only once.
+
+    :param instance_names: List of names of EC2 instances (tagged with 'Name')
+    """
+    cache = _load_instance_cache()
+    removed = [cache.pop(_instance_cache_key(instance_name), None) for instance_name in instance_names]
+    if any(entry is not None for entry in removed):
+        _save_instance_cache(cache)
+
+def invalidate_state_change(instance_ids):
+    """
+    Removes every cached entry that includes one of the given instances after they
+    were started or stopped, since the states recorded for them are out of date.
+    This also covers entries cached for other names or wildcard patterns.
+
+    :param instance_ids: List of IDs of the EC2 instances that changed state
+    """
+    changed = set(instance_ids)
+    cache = _load_instance_cache()
+    stale_keys = [
+        key for key, entry in cache.items()
+        if any(instance_id in changed for instance_id, _state in entry['instances'])
+    ]
+    for key in stale_keys:
+        del cache[key]
+    if stale_keys:
+        _save_instance_cache(cache)
+
+# Helper function to retrieve EC2 instance IDs based on instance name tags
+def get_instance_ids_by_names(instance_names, states=None):
+    """
+    Retrieves EC2 instance IDs for several instance names. Names not found in the cache
+    are looked up together with a single DescribeInstances call filtering on all of
+    them, and the results are cached on disk for INSTANCE_CACHE_TTL seconds.
+
+    The cache records the state of every instance, so one lookup serves both
+    'start-ec2' and 'stop-ec2'; the state filter is applied locally.
+
+    :param instance_names: List of names of EC2 instances (tagged with 'Name') to retrieve
+    :param states: Optional list of instance states (e.g. ['stopped']) to restrict the
+                   result to, or None for any state in LOOKUP_STATES
+    :return: Dictionary mapping each name that was found to its list of instance IDs
     """
     try:
-        # Describe EC2 instances with a 'Name' tag matching the instance_name
-        response = ec2.describe_instances(
-            Filters=[{
+        # Reuse the instances from recent lookups of the same names, if any. The cache
+        # file is read once here and written at most once below, however many names
+        cache = _load_instance_cache()
+        instances_by_name = {}
+        missing_names = []
+        for instance_name in dict.fromkeys(instance_names):
+            instances = get_cached_instances(cache, instance_name)
+            if instances:
+                instances_by_name[instance_name] = instances
+            else:
+                missing_names.append(instance_name)
+
+        if missing_names:
+            # Describe EC2 instances with a 'Name' tag matching any of the missing names,
+            # letting EC2 drop terminated instances, which can never be started or stopped
+            filters = [{
                 'Name': 'tag:Name',
-                'Values': [instance_name]
+                'Values': missing_names
+            }, {
+                'Name': 'instance-state-name',
+                'Values': LOOKUP_STATES
             }]
-        )
-        # Initialize list to store found instance IDs
-        instance_ids = []
-        for reservation in response['Reservations']:
-            for instance in reservation['Instances']:
-                instance_ids.append(instance['InstanceId'])
-        
-        if not instance_ids:
-            # Handle case where no instances are found with the given name
-            print(f"No instances found with the name: {instance_name}")
-            return None
-        return instance_ids
-    except ClientError as e:
+            # Walk every page of results, so large accounts are not silently truncated,
+            # and extract just the instance ID, state and 'Name' tag of each instance
+            paginator = _ec2().get_paginator('describe_instances')
+            results = paginator.paginate(Filters=filters).search(
+                "Reservations[].Instances[].[InstanceId, State.Name, Tags[?Key=='Name'].Value | [0]]"
+            )
+            results = list(results)
+
+            for instance_name in missing_names:
+                # Assign each found instance to every requested name (or wildcard
+                # pattern) that its 'Name' tag matches
+                pattern = _name_tag_pattern(instance_name)
+                instances = [
+                    [instance_id, state] for instance_id, state, name in results
+                    if name is not None and pattern.fullmatch(name)
+                ]
+                if instances:
+                    cache_instances(cache, instance_name, instances)
+                    instances_by_name[instance_name] = instances
+            if instances_by_name.keys() & set(missing_names):
+                _save_instance_cache(cache)
+
+        instance_ids_by_name = {}
+        for instance_name in dict.fromkeys(instance_names):
+            instance_ids = [
+                instance_id for instance_id, state in instances_by_name.get(instance_name, [])
+                if states is None or state in states
+            ]
+            if not instance_ids:
+                # Handle case where no instances are found with the given name
+                state_text = f"{'/'.join(states)} " if states else ''
+                log.warning(f"No {state_text}instances found with the name: {instance_name}")
+                continue
+            instance_ids_by_name[instance_name] = instance_ids
+        return instance_ids_by_name
+    except (ClientError, NoCredentialsError, PartialCredentialsError) as e:
         # Handle errors related to AWS services
-        print(f"Failed to retrieve instance ID: {e}")
-        return None
-    except Exception as e:
-        # Handle any other unexpected errors
-        print(f"Unexpected error: {e}")
-        return None
+        log.error(f"Failed to retrieve instance ID: {e}")
+        return {}
+
+# Helper function to match 'Name' tags the same way EC2's tag:Name filter does
+def _name_tag_pattern(instance_name):
+    """
+    Compiles an instance name into a regular expression following EC2 filter
+    semantics: '*' matches any sequence of characters, '?' matches a single
+    character, and a backslash escapes the next character.
+
+    :param instance_name: Name of the EC2 instance (tagged with 'Name'), possibly with wildcards
+    :return: Compiled regular expression matching the whole 'Name' tag
+    """
+    parts = []
+    chars = iter(instance_name)
+    for char in chars:
+        if char == '\\':
+            parts.append(re.escape(next(chars, '\\')))
+        elif char == '*':
+            parts.append('.*')
+        elif char == '?':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.DOTALL)
+
+# Helper function to combine the instance IDs of several names into one list
+def flatten_instance_ids(instance_ids_by_name):
+    """
+    Flattens a name-to-IDs mapping into a single list of unique instance IDs.
+
+    :param instance_ids_by_name: Dictionary mapping instance names to lists of instance IDs
+    :return: List of instance IDs, in the order the names were given
+    """
+    return list(dict.fromkeys(
+        instance_id
+        for instance_ids in instance_ids_by_name.values()
+        for instance_id in instance_ids
+    ))
+
+# Map each subcommand to the function that runs it. argparse already enforces the
+# required positional arguments, so they can be passed through directly.
+DISPATCH = {
+    'start-ec2': lambda args: start_ec2(args.instance_name),
+    'stop-ec2': lambda args: stop_ec2(args.instance_name),
+    'upload-s3': lambda args: upload_files_s3(args.bucket_name, args.file_name,
+                                              chunk_size=args.chunk_size * 1024 * 1024,
+                                              max_concurrency=args.max_concurrency,
+                                              accelerate=args.accelerate),
+    'create-policy': lambda args: create_policy(args.policy_name, args.policy_document),
+}
+
+# Helper function to validate numeric command-line options
+def positive_int(value):
+    """
+    argparse type for options that must be a positive integer.
+
+    :param value: Option value as given on the command line
+    :return: The value as an int
+    :raises argparse.ArgumentTypeError: If the value is not an integer greater than zero
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value!r}")
+    return number
 
 # Main function for parsing command-line arguments and executing commands
-def main():
+def main(argv=None):
     """
     Main function to parse command-line arguments and execute the corresponding AWS operation.
     Supports starting/stopping EC2 instances, uploading files to S3, and creating IAM policies.
+
+    :param argv: List of command-line arguments, or None to use sys.argv
+    :return: Exit status: 0 on completion, 1 if an unexpected error occurred
     """
     parser = argparse.ArgumentParser(description="Custom AWS CLI Tool")
+    parser.add_argument('--daemon', action='store_true',
+                        help='Run in the background, keeping AWS clients warm for later invocations')
 
     # Define subcommands for different operations
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
 
     # Subcommand to start an EC2 instance
-    ec2_start_parser = subparsers.add_parser('start-ec2', help='Start an EC2 instance by name')
-    ec2_start_parser.add_argument('instance_name', help='Name of the EC2 instance to start')
+    ec2_start_parser = subparsers.add_parser('start-ec2', help='Start EC2 instance(s) by name')
+    ec2_start_parser.add_argument('instance_name', nargs='+', help='Name(s) of the EC2 instance(s) to start')
 
     # Subcommand to stop an EC2 instance
-    ec2_stop_parser = subparsers.add_parser('stop-ec2', help='Stop an EC2 instance by name')
-    ec2_stop_parser.add_argument('instance_name', help='Name of the EC2 instance to stop')
+    ec2_stop_parser = subparsers.add_parser('stop-ec2', help='Stop EC2 instance(s) by name')
+    ec2_stop_parser.add_argument('instance_name', nargs='+', help='Name(s) of the EC2 instance(s) to stop')
 
     # Subcommand to upload a file to an S3 bucket
-    s3_upload_parser = subparsers.add_parser('upload-s3', help='Upload a file to an S3 bucket')
+    s3_upload_parser = subparsers.add_parser('upload-s3', help='Upload file(s) to an S3 bucket')
     s3_upload_parser.add_argument('bucket_name', help='Name of the S3 bucket')
-    s3_upload_parser.add_argument('file_name', help='Path to the file to upload')
+    s3_upload_parser.add_argument('file_name', nargs='+', help='Path(s) to the file(s) to upload')
+    s3_upload_parser.add_argument('--chunk-size', type=positive_int, default=MULTIPART_CHUNKSIZE // (1024 * 1024),
+                                  help='Multipart upload part size in MiB (default: %(default)s)')
+    s3_upload_parser.add_argument('--max-concurrency', type=positive_int, default=MAX_CONCURRENCY,
+                                  help='Maximum number of parts uploaded in parallel, across all files '
+                                       '(default: %(default)s)')
+    s3_upload_parser.add_argument('--accelerate', action='store_true',
+                                  help='Upload through the S3 Transfer Acceleration endpoint '
+                                       '(must be enabled on the bucket)')
 
     # Subcommand to create an IAM policy
     iam_policy_parser = subparsers.add_parser('create-policy', help='Create an IAM policy')
@@ -177,44 +889,359 @@ def main():
     Stop an EC2 instance:
     python aws-cli-custom.py stop-ec2 MyInstanceName
 
+    Start several EC2 instances at once:
+    python aws-cli-custom.py start-ec2 WebServer1 WebServer2 WebServer3
+
     Upload a file to S3:
     python aws-cli-custom.py upload-s3 my-bucket myfile.txt
 
+    Upload several files to S3 at once:
+    python aws-cli-custom.py upload-s3 my-bucket file1.txt file2.txt file3.txt
+
+    Upload a large file to S3 with 64 MiB parts and 16 parallel connections:
+    python aws-cli-custom.py upload-s3 my-bucket large.iso --chunk-size 64 --max-concurrency 16
+
+    Upload a file from far away from the bucket's region using Transfer Acceleration:
+    python aws-cli-custom.py upload-s3 my-bucket large.iso --accelerate
+
     Create an IAM policy:
     python aws-cli-custom.py create-policy MyPolicy '{"Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "s3:*", "Resource": "*"}]}'
+
+    Keep AWS clients warm for later invocations (in another terminal):
+    python aws-cli-custom.py --daemon
     """
 
     # Parse command-line arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
-    # Execute the corresponding function based on the command provided
-    if args.command == 'start-ec2':
-        if not args.instance_name:
-            print("Error: 'instance_name' is required for start-ec2")
-        else:
-            start_ec2(args.instance_name)
+    if args.daemon:
+        return run_daemon()
 
-    elif args.command == 'stop-ec2':
-        if not args.instance_name:
-            print("Error: 'instance_name' is required for stop-ec2")
-        else:
-            stop_ec2(args.instance_name)
+    # Create only the client needed by the selected command. Uploads create their
+    # S3 client on demand, since multi-file uploads do so in each worker process.
+    client_factories = {
+        'start-ec2': _ec2,
+        'stop-ec2': _ec2,
+        'create-policy': _iam,
+    }
+    try:
+        if args.command in client_factories:
+            client_factories[args.command]()
 
-    elif args.command == 'upload-s3':
-        if not args.bucket_name or not args.file_name:
-            print("Error: Both 'bucket_name' and 'file_name' are required for upload-s3")
-        else:
-            upload_file_s3(args.bucket_name, args.file_name)
+        # Execute the corresponding function based on the command provided, or show
+        # the help text if no command was given
+        DISPATCH.get(args.command, lambda _args: parser.print_help())(args)
+    except Exception as e:
+        # The command functions only handle expected AWS errors; report anything
+        # else here, in one place, along with its traceback
+        log.exception(f"Unexpected error: {e}")
+        return 1
+    return 0
 
-    elif args.command == 'create-policy':
-        if not args.policy_name or not args.policy_document:
-            print("Error: Both 'policy_name' and 'policy_document' are required for create-policy")
-        else:
-            create_policy(args.policy_name, args.policy_document)
+# Helper functions for exchanging length-prefixed JSON messages over a socket
+def _send_message(sock, message):
+    """
+    Sends a JSON-serializable message, prefixed with its length.
+
+    :param sock: Connected socket
+    :param message: Message to send
+    """
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(data)) + data)
+
+def _recv_exactly(sock, size):
+    """
+    Reads exactly size bytes from a socket.
+
+    :param sock: Connected socket
+    :param size: Number of bytes to read
+    :return: Bytes read
+    :raises ConnectionError: If the connection is closed before size bytes arrive
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+def _recv_message(sock):
+    """
+    Receives a length-prefixed JSON message.
+
+    :param sock: Connected socket
+    :return: Decoded message
+    """
+    (size,) = struct.unpack('>I', _recv_exactly(sock, 4))
+    return json.loads(_recv_exactly(sock, size).decode('utf-8'))
+
+# Helper function to check that a directory is only accessible by the current user
+def _is_private_directory(path):
+    """
+    Checks, without following symlinks, that a directory is private to the current user.
+
+    :param path: Path of the directory
+    :return: True if the path is a directory (not a symlink to one) owned by the
+             current user and inaccessible to group and others, False otherwise
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+# Helper function to check that a path is a socket created by the current user
+def _is_own_socket(path):
+    """
+    Checks, without following symlinks, that a path is a socket owned by the current user.
+
+    :param path: Path of the socket
+    :return: True if the path is a Unix socket owned by the current user, False otherwise
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+# Helper function to locate the daemon's socket
+def daemon_socket_path(create=False):
+    """
+    Returns the path of the Unix socket the daemon listens on. The socket lives in a
+    directory only the current user can access: $XDG_RUNTIME_DIR if it is set, and
+    otherwise a private per-user subdirectory of the temporary directory.
+
+    :param create: Whether to create the per-user subdirectory if it does not exist
+    :return: Socket path, or None if Unix sockets are not supported on this platform
+             or no private directory is available
+    """
+    if not hasattr(socket, 'AF_UNIX') or not hasattr(os, 'getuid'):
+        return None
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and _is_private_directory(runtime_dir):
+        return os.path.join(runtime_dir, 'aws-cli-custom.sock')
+    directory = os.path.join(tempfile.gettempdir(), f'aws-cli-custom-{os.getuid()}')
+    if create:
+        with contextlib.suppress(OSError):
+            os.mkdir(directory, 0o700)
+    # Refuse a directory created by another user (or with loose permissions), which
+    # could be used to intercept commands or to plant a fake daemon
+    if not _is_private_directory(directory):
+        return None
+    return os.path.join(directory, 'daemon.sock')
+
+# Helper function to collect the environment that affects how AWS is reached
+def _daemon_environment():
+    """
+    Collects the environment variables that select the AWS identity, region and
+    endpoints, which must match for a command to be forwarded to the daemon.
 
-    else:
-        parser.print_help()
+    :return: Dictionary of the DAEMON_ENV_PREFIX and DAEMON_ENV_VARS values set in
+             this process
+    """
+    return {
+        name: value for name, value in os.environ.items()
+        if name.startswith(DAEMON_ENV_PREFIX) or name in DAEMON_ENV_VARS
+    }
+
+# Function to forward a command to a running daemon
+def forward_to_daemon(argv):
+    """
+    Sends the command-line arguments to a running daemon and writes out its output.
+
+    :param argv: List of command-line arguments
+    :return: Exit status of the command, or None if no compatible daemon is running or
+             it is busy running another command (the caller should then run the
+             command itself)
+    """
+    path = daemon_socket_path()
+    if path is None or not _is_own_socket(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with sock:
+        # Give up on a daemon that does not accept the request in time
+        sock.settimeout(DAEMON_IO_TIMEOUT)
+        try:
+            sock.connect(path)
+        except OSError:
+            # No daemon is running (or a stale socket was left behind), or it cannot
+            # be reached; run the command directly instead
+            return None
+        try:
+            _send_message(sock, {'argv': argv, 'cwd': os.getcwd(), 'env': _daemon_environment()})
+            # The command itself (e.g. a large upload) may take arbitrarily long
+            sock.settimeout(None)
+            response = _recv_message(sock)
+        except (OSError, ValueError) as e:
+            # Do not fall back to running the command here: the daemon may already
+            # have carried it out
+            log.error(f"Lost connection to the daemon: {e}")
+            return 1
+    if response['status'] is None:
+        # The daemon was started for a different AWS environment, or is busy
+        return None
+    sys.stdout.write(response['stdout'])
+    sys.stdout.flush()
+    sys.stderr.write(response['stderr'])
+    sys.stderr.flush()
+    return response['status']
+
+# Helper function to run one forwarded command inside the daemon
+def _run_daemon_command(request, environment):
+    """
+    Runs a command received by the daemon, capturing its output.
+
+    :param request: Dictionary with the command's 'argv', 'cwd' and 'env'
+    :param environment: The daemon's own environment, as collected by _daemon_environment
+    :return: Dictionary with the command's 'stdout' and 'stderr' output and exit 'status'
+    """
+    if request.get('env') != environment:
+        return {'stdout': '', 'stderr': '', 'status': None}
+    if '--daemon' in request['argv']:
+        return {'stdout': 'Error: the daemon is already running\n', 'stderr': '', 'status': 1}
+
+    previous_cwd = os.getcwd()
+    with captured_output() as (stdout, stderr):
+        try:
+            # Resolve relative file names against the caller's working directory
+            os.chdir(request['cwd'])
+            status = main(request['argv'])
+        except SystemExit as e:
+            # argparse exits after printing help or usage errors
+            status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except OSError as e:
+            log.error(f"Error: {e}")
+            status = 1
+        finally:
+            os.chdir(previous_cwd)
+    return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'status': status}
+
+# Helper function run in a thread of the daemon for each forwarded command
+def _serve_daemon_request(sock, request, environment):
+    """
+    Runs a forwarded command and sends its output and exit status back to the client.
+
+    :param sock: Connected client socket, closed once the response is sent
+    :param request: Decoded request received from the client
+    :param environment: The daemon's own environment, as collected by _daemon_environment
+    """
+    with sock:
+        response = _run_daemon_command(request, environment)
+        try:
+            _send_message(sock, response)
+        except OSError as e:
+            # The client disconnected or stopped reading before the command finished
+            log.error(f"Dropped response: {e}")
+            handler.flush()
+
+# Function to run the background daemon
+def run_daemon():
+    """
+    Listens on a per-user Unix socket and runs forwarded commands in this process, so
+    later invocations reuse the already imported boto3, the warm AWS clients and their
+    open HTTPS connections instead of paying the start-up cost again.
+
+    Commands run one at a time, in a separate thread. Requests that arrive while one
+    is running are turned away at once, so their callers run them directly instead
+    of waiting.
+
+    :return: Exit status
+    """
+    path = daemon_socket_path(create=True)
+    if path is None:
+        log.error("Error: the daemon requires Unix domain sockets and a private directory for its socket "
+                  "(set XDG_RUNTIME_DIR to a directory with mode 0700)")
+        return 1
+    if _is_own_socket(path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            probe.settimeout(DAEMON_IO_TIMEOUT)
+            try:
+                probe.connect(path)
+            except OSError:
+                pass
+            else:
+                log.error(f"Error: a daemon is already listening on {path}")
+                return 1
+
+    # Record the environment before creating the clients, which may set
+    # AWS_EC2_METADATA_DISABLED; a client process has not done so when it compares
+    environment = _daemon_environment()
+    # Create the EC2, S3 and IAM clients and resolve credentials up front
+    _ec2()
+    _s3(False, MAX_CONCURRENCY)
+    _iam()
+
+    with contextlib.suppress(FileNotFoundError):
+        # Remove a socket left behind by a daemon that did not shut down cleanly
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Only the current user may connect to the socket, even if the directory's
+    # permissions are later loosened
+    previous_umask = os.umask(0o177)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(previous_umask)
+    listener.listen()
+    # Shut down cleanly, removing the socket, when terminated
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    log.info(f"Listening on {path}")
+    handler.flush()
+
+    connections = []
+    worker = None
+    try:
+        while True:
+            readable, _, _ = select.select([listener] + connections, [], [])
+            for sock in readable:
+                if sock is listener:
+                    connection, _ = listener.accept()
+                    # A client that stalls while sending its request or receiving the
+                    # response must not block the daemon for everyone else
+                    connection.settimeout(DAEMON_IO_TIMEOUT)
+                    connections.append(connection)
+                    continue
+                connections.remove(sock)
+                busy = worker is not None and worker.is_alive()
+                try:
+                    request = _recv_message(sock)
+                    if busy:
+                        # Another command is running; let the client run its command
+                        # itself rather than queue it behind that one
+                        _send_message(sock, {'stdout': '', 'stderr': '', 'status': None})
+                except (OSError, ValueError) as e:
+                    # A client disconnected or sent a malformed request. While a command
+                    # runs its output is being captured, so nothing is logged then
+                    if not busy:
+                        log.error(f"Dropped request: {e}")
+                        handler.flush()
+                    busy = True
+                if busy:
+                    sock.close()
+                    continue
+                # Run the command in its own thread, so that the daemon keeps answering
+                # other clients while it runs
+                worker = threading.Thread(target=_serve_daemon_request, args=(sock, request, environment))
+                worker.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sock in connections:
+            sock.close()
+        listener.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+        if worker is not None:
+            # Let a running command finish and send its output
+            worker.join()
+    return 0
 
 # Entry point for the script
 if __name__ == '__main__':
-    main()
+    arguments = sys.argv[1:]
+    # Hand the command to a running daemon if there is one, otherwise run it here
+    exit_status = None if '--daemon' in arguments else forward_to_daemon(arguments)
+    if exit_status is None:
+        exit_status = main(arguments)
+    sys.exit(exit_status)